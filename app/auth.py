@@ -1,9 +1,15 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update, bindparam
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
 from .models import User
-from .utils import verify_password, hash_password
+from .utils import verify_password, hash_password, password_needs_update
 from .schemas import UserCreate, UserOut
 from .database import get_db
 
@@ -11,15 +17,29 @@ from .database import get_db
 router = APIRouter()
 security = HTTPBasic()
 
+# Verified against when the username is unknown, so that both failure paths
+# pay for a full hash and response time does not reveal which users exist.
+_DUMMY_HASH = hash_password("dummy")
+
+# Password hashing is CPU bound (and each Argon2 hash holds 64 MiB), so it runs
+# on a pool sized to the CPU count rather than on the event loop.
+executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# Only the columns needed to authenticate, served by the unique username index
+_GET_CREDENTIALS_STMT = select(User.id, User.hashed_password).where(
+    User.username == bindparam("username")
+)
+
+
 @router.post("/register", response_model=UserOut)
 async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Registers a new user in the system.
 
     This endpoint allows a new user to register by providing a username and password.
-    It checks if the username already exists in the database and raises an HTTP 400 error
-    if the username is already registered. If the registration is successful, the new user
-    is added to the database and returned.
+    The username is enforced unique by the database, so a duplicate is detected
+    when the insert is flushed and reported as an HTTP 400 error. If the
+    registration is successful, the new user is added to the database and returned.
 
     Args:
         user (UserCreate): The user data containing the username and password.
@@ -30,29 +50,22 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
 
     Raises:
         HTTPException: If the username is already registered (400 Bad Request).
-        HTTPException: If an internal server error occurs (500 Internal Server Error).
     """
+    loop = asyncio.get_running_loop()
+    hashed_password = await loop.run_in_executor(executor, hash_password, user.password)
+    new_user = User(
+        username=user.username,
+        hashed_password=hashed_password
+    )
+    db.add(new_user)
     try:
-        # Check if username exists
-        result = await db.execute(select(User).where(User.username == user.username))
-        existing_user = result.scalar_one_or_none()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already registered",
-            )
-
-        new_user = User(
-            username=user.username,
-            hashed_password=hash_password(user.password)
+        await db.flush()
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already registered",
         )
-        db.add(new_user)
-        await db.commit()
-        await db.refresh(new_user)
-        return new_user
-    except Exception as e:
-        print("Registration error:", str(e))
-        raise HTTPException(status_code=500, detail="Internal server error")
+    return new_user
 
 
 async def get_current_user(
@@ -67,19 +80,31 @@ async def get_current_user(
         db (AsyncSession): The asynchronous database session dependency.
 
     Returns:
-        User: The authenticated user object.
+        Row: The authenticated user's `id` and `hashed_password`.
 
     Raises:
         HTTPException: If the username does not exist or the password is invalid. 
                     The exception is raised with a 401 Unauthorized status code.
     """
-    result = await db.execute(select(User).where(User.username == credentials.username))
-    user = result.scalar_one_or_none()
+    result = await db.execute(_GET_CREDENTIALS_STMT, {"username": credentials.username})
+    user = result.first()
 
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    hashed = user.hashed_password if user else _DUMMY_HASH
+    loop = asyncio.get_running_loop()
+    password_ok = await loop.run_in_executor(executor, verify_password, credentials.password, hashed)
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
             headers={"WWW-Authenticate": "Basic"},
         )
+
+    # Transparently migrate hashes from deprecated schemes or older cost settings
+    if password_needs_update(user.hashed_password):
+        new_hash = await loop.run_in_executor(executor, hash_password, credentials.password)
+        await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(hashed_password=new_hash)
+        )
     return user
\ No newline at end of file
@@ -1,11 +1,74 @@
-from sqlalchemy.orm import Session
+import asyncio
+import weakref
+
+from cachetools import TTLCache
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
-from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, insert, update, delete, event, bindparam
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 
 from . import models, schemas
 
+# Recently read books, shared by all requests handled by this worker
+_book_cache = TTLCache(maxsize=1024, ttl=30)
+# One lock per book ID being loaded, so concurrent misses issue a single query
+_book_locks = weakref.WeakValueDictionary()
+
+# Statements built once at import, with parameters bound per call
+_GET_BOOK_STMT = select(models.Book).where(models.Book.id == bindparam("bid"))
+_GET_BOOKS_STMT = (
+    select(models.Book)
+    .order_by(models.Book.id)
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_GET_REVIEWS_STMT = (
+    select(models.Book)
+    .options(joinedload(models.Book.reviews))
+    .where(models.Book.id == bindparam("bid"))
+)
+# "fetch": the default evaluator would see the bindparam's compile-time value
+# and leave Book instances loaded in the session marked as persistent
+_DELETE_BOOK_STMT = (
+    delete(models.Book)
+    .where(models.Book.id == bindparam("bid"))
+    .execution_options(synchronize_session="fetch")
+)
+
+
+def _evict_book(db: AsyncSession, book_id: int):
+    """
+    Drop a book from the cache now and again once the session commits, so that
+    a concurrent read cannot re-cache the old row before the change is visible.
+    """
+    _book_cache.pop(book_id, None)
+    db.info.setdefault("evicted_books", set()).add(book_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_writes(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_books(session):
+    session.info.pop("has_writes", None)
+    for book_id in session.info.pop("evicted_books", ()):
+        _book_cache.pop(book_id, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_writes(session):
+    session.info.pop("has_writes", None)
+    session.info.pop("evicted_books", None)
+
 
 async def insert_book_data(db: AsyncSession, book: schemas.BookCreate):
     """
@@ -16,30 +79,44 @@ async def insert_book_data(db: AsyncSession, book: schemas.BookCreate):
         book (schemas.BookCreate): The book data to be inserted, adhering to the BookCreate schema.
 
     Returns:
-        models.Book: The newly created book record after being committed and refreshed in the database.
+        models.Book: The newly created book record, as returned by the INSERT.
     """
-    json_compatible_item_data = jsonable_encoder(book)
-    db_book = models.Book(**json_compatible_item_data)
-    db.add(db_book)
-    await db.commit()
-    await db.refresh(db_book)
-    return db_book
+    query_ = insert(models.Book).values(**book.model_dump()).returning(models.Book)
+    result = await db.execute(query_)
+    return result.scalar_one()
 
 
 async def get_book(db: AsyncSession, book_id: int):
     """
     Retrieve a book from the database by its ID.
 
+    Found books are kept as snapshots in a short-lived in-process cache. A book is
+    only cached when the session has not written in its current transaction, so
+    uncommitted changes never reach other requests.
+
     Args:
         db (AsyncSession): The asynchronous database session to use for the query.
         book_id (int): The ID of the book to retrieve.
 
     Returns:
-        models.Book or None: The book object if found, otherwise None.
+        schemas.BookCreate or None: A snapshot of the book if found, otherwise None.
     """
-    query_ = select(models.Book).where(models.Book.id == book_id)
-    result = await db.execute(query_)
-    books = result.scalars().first()
+    books = _book_cache.get(book_id)
+    if books is not None:
+        return books
+
+    lock = _book_locks.setdefault(book_id, asyncio.Lock())
+    async with lock:
+        books = _book_cache.get(book_id)
+        if books is not None:
+            return books
+        result = await db.execute(_GET_BOOK_STMT, {"bid": book_id})
+        db_book = result.scalars().first()
+        if db_book is None:
+            return None
+        books = schemas.BookCreate.model_validate(db_book)
+        if not db.info.get("has_writes"):
+            _book_cache[book_id] = books
     return books
 
 async def get_books(db: AsyncSession, skip: int = 0, limit: int = 100):
@@ -54,7 +131,7 @@ async def get_books(db: AsyncSession, skip: int = 0, limit: int = 100):
     Returns:
         List[models.Book]: A list of Book objects retrieved from the database.
     """
-    result = await db.execute(select(models.Book))
+    result = await db.execute(_GET_BOOKS_STMT, {"skip": skip, "limit": limit})
     return result.scalars().all()
 
 async def update_book_data(db: AsyncSession, book_id: int, book: schemas.BookCreate):
@@ -76,18 +153,29 @@ async def update_book_data(db: AsyncSession, book_id: int, book: schemas.BookCre
     result = await db.execute(query_)
     if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Book not found")
-    await db.commit()
-    return await get_book(db=db, book_id=book_id)
+    _evict_book(db, book_id)
+    # Read back without caching, the update is not committed yet
+    return await db.get(models.Book, book_id)
 
 
 async def delete_book_data(db: AsyncSession, book_id: int):
-    result = await db.execute(select(models.Book).where(models.Book.id == book_id))
-    book = result.scalar_one_or_none()
-    if not book:
+    """
+    Delete a book from the database by its ID.
+
+    Args:
+        db (AsyncSession): The database session to use for the operation.
+        book_id (int): The ID of the book to delete.
+
+    Returns:
+        bool: True if the book was deleted.
+
+    Raises:
+        HTTPException: If the book with the given ID is not found, raises a 404 error.
+    """
+    result = await db.execute(_DELETE_BOOK_STMT, {"bid": book_id})
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Book not found")
-    query_ = delete(models.Book).where(models.Book.id == book_id)
-    await db.execute(query_)
-    await db.commit()
+    _evict_book(db, book_id)
     return True
     
 
@@ -100,20 +188,25 @@ async def insert_review_data(db: AsyncSession, review: schemas.ReviewCreate):
         review (schemas.ReviewCreate): The review data to be inserted, adhering to the ReviewCreate schema.
 
     Returns:
-        models.Review: The newly created review record after being committed and refreshed in the database.
+        models.Review: The newly created review record, as returned by the INSERT.
+
+    Raises:
+        HTTPException: If the referenced book does not exist, raises a 404 error.
     """
-    json_compatible_item_data = jsonable_encoder(review)
-    db_review = models.Review(**json_compatible_item_data)
-    db.add(db_review)
-    await db.commit()
-    await db.refresh(db_review)
-    return db_review
+    query_ = insert(models.Review).values(**review.model_dump()).returning(models.Review)
+    try:
+        result = await db.execute(query_)
+    except IntegrityError:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return result.scalar_one()
 
 
 async def get_review(db: AsyncSession, book_id: int):
     """
     Retrieve all reviews for a specific book from the database.
 
+    The book and its reviews are loaded together in a single query.
+
     Args:
         db (AsyncSession): The database session to use for the query.
         book_id (int): The ID of the book for which reviews are to be retrieved.
@@ -122,11 +215,13 @@ async def get_review(db: AsyncSession, book_id: int):
         List[models.Review]: A list of review objects associated with the specified book.
 
     Raises:
-        HTTPException: If no reviews are found for the given book ID, a 404 error is raised.
+        HTTPException: If the book is not found, or no reviews are found for it, a 404 error is raised.
     """
-    query_ = select(models.Review).where(models.Review.book_id == book_id)
-    result = await db.execute(query_)
-    reviews = result.scalars().all()
+    result = await db.execute(_GET_REVIEWS_STMT, {"bid": book_id})
+    book = result.unique().scalars().first()
+    if book is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    reviews = book.reviews
     if not reviews:
         raise HTTPException(status_code=404, detail="Review not found")
     return reviews
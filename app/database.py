@@ -1,15 +1,50 @@
 # -*- coding: utf-8 -*-
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from dotenv import load_dotenv
+from uuid import uuid4
 import os
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Connection pool sizing, overridable per deployment
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+
+# Set when DATABASE_URL points at PgBouncer in transaction pooling mode
+DB_USE_PGBOUNCER = os.getenv("DB_USE_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+
+if DB_USE_PGBOUNCER:
+    # PgBouncer owns the pool; server-side prepared statements cannot be
+    # reused across transactions, so both asyncpg caches are disabled. The
+    # statements asyncpg still prepares get unique names, so they cannot
+    # collide on a server connection shared with other clients.
+    engine = create_async_engine(
+        DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        },
+        echo=False,
+    )
+else:
+    engine = create_async_engine(
+        DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        echo=False,
+    )
 
 Base = declarative_base()
 
@@ -20,7 +55,9 @@ async_session = sessionmaker(
 )
 
 
-# Dependency for FastAPI routes
+# Dependency for FastAPI routes. Each request runs in a single transaction,
+# committed once the route returns and rolled back if it raises.
 async def get_db():
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        async with session.begin():
+            yield session
\ No newline at end of file
@@ -1,4 +1,6 @@
 import asyncio
+import hashlib
+import logging
 import os
 from concurrent.futures import ThreadPoolExecutor
 from math import ceil
@@ -9,29 +11,58 @@ from . import crud, schemas
 from .models import User
 from .database import engine, get_db, Base
 from langchain_community.llms import LlamaCpp
+from llama_cpp import GGML_TYPE_Q8_0
 from langchain_core.callbacks import CallbackManager, StreamingStdOutCallbackHandler
 from dotenv import load_dotenv
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
 from . import auth
+from .utils import configure_logging
 
 
 app = FastAPI(dependencies=[Depends(auth.get_current_user)])
 # Include the authentication router
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 
-executor = ThreadPoolExecutor()
+logger = logging.getLogger(__name__)
+
+# The model is a single CPU/GPU resource: parallel calls only thrash its
+# caches, so generation is serialized on one dedicated worker.
+executor = ThreadPoolExecutor(max_workers=1)
+llm_sem = asyncio.Semaphore(1)
 # Load environment variables from .env file
 # Ensure you have a .env file with the necessary variables
 # such as DB_URL, LLMA_FILE_NAME, etc.
 load_dotenv()
 
+# Generated LLM text is cached in Redis, keyed by a hash of the prompt. Short
+# timeouts make an unreachable Redis fall back to the model quickly.
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", "0.5"))
+redis_client = aioredis.from_url(
+    os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+    decode_responses=True,
+    socket_connect_timeout=REDIS_TIMEOUT,
+    socket_timeout=REDIS_TIMEOUT,
+)
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+
+# Upper bound on the page size accepted by GET /books/
+MAX_BOOKS_PAGE_SIZE = 1000
 
 
 @app.on_event("startup")
 async def on_startup():
+    app.state.log_listener = configure_logging()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await redis_client.aclose()
+    app.state.log_listener.stop()
+
+
 # models.Base.metadata.create_all(bind=engine)
 
 # Callbacks support token-wise streaming
@@ -41,11 +72,26 @@ llama_file_name = os.getenv("LLMA_FILE_NAME")
 llama_file_path = os.path.join(
     os.path.dirname(os.path.abspath(__file__)), "models", llama_file_name
 )
+# Optional int8 K/V cache, halving its memory traffic on long prompts.
+# llama.cpp only supports a quantized V cache with flash attention.
+llama_model_kwargs = {}
+if os.getenv("LLAMA_KV_CACHE_Q8", "false").lower() in ("1", "true", "yes"):
+    llama_model_kwargs = {
+        "type_k": GGML_TYPE_Q8_0,
+        "type_v": GGML_TYPE_Q8_0,
+        "flash_attn": True,
+    }
+
 # Make sure the model path is correct for your system!
+# Set LLAMA_N_GPU_LAYERS=0 on CPU-only hosts to avoid partial offload
 llm = LlamaCpp(
     model_path=llama_file_path,
     n_ctx=2048,
-    n_gpu_layers=20,
+    n_batch=512,
+    n_threads=os.cpu_count(),
+    n_gpu_layers=int(os.getenv("LLAMA_N_GPU_LAYERS", "20")),
+    use_mlock=True,
+    model_kwargs=llama_model_kwargs,
     temperature=0.7,
     top_p=0.95,
     verbose=True,
@@ -98,6 +144,38 @@ def generate(prompt):
     return llm.invoke(prompt)
 
 
+async def cached_generate(prompt: str, ttl: int = LLM_CACHE_TTL) -> str:
+    """
+    Generates a response for the given prompt, reusing a cached result when available.
+
+    The cache is best effort: if Redis is unavailable the model is invoked directly.
+
+    Args:
+        prompt (str): The input text prompt to generate a response for.
+        ttl (int, optional): How long to keep the generated text, in seconds. Defaults to LLM_CACHE_TTL.
+
+    Returns:
+        str: The generated (or cached) response from the language model.
+    """
+    key = "llm:" + hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    try:
+        cached = await redis_client.get(key)
+    except RedisError:
+        logger.warning("LLM cache read failed, calling the model directly", exc_info=True)
+        cached = None
+    if cached is not None:
+        return cached
+
+    loop = asyncio.get_running_loop()
+    async with llm_sem:
+        response = str(await loop.run_in_executor(executor, generate, prompt))
+    try:
+        await redis_client.setex(key, ttl, response)
+    except RedisError:
+        logger.warning("LLM cache write failed", exc_info=True)
+    return response
+
+
 @app.post("/books/", response_model=schemas.BookCreate)
 async def create_book(book: schemas.BookCreate, db: AsyncSession = Depends(get_db)):
     """
@@ -118,9 +196,8 @@ async def create_book(book: schemas.BookCreate, db: AsyncSession = Depends(get_d
     """
     prompt = f"Summarize book title {book.title} by {book.author} in 150 words."
     try:
-        loop = asyncio.get_running_loop()
-        response = await loop.run_in_executor(executor, generate, prompt)
-        update_book = book.copy(update={"summary": str(response)})
+        response = await cached_generate(prompt)
+        update_book = book.copy(update={"summary": response})
         db_book = await crud.insert_book_data(db=db, book=update_book)
         return db_book
     except Exception as e:
@@ -128,13 +205,18 @@ async def create_book(book: schemas.BookCreate, db: AsyncSession = Depends(get_d
     
 
 @app.get("/books/", response_model=list[schemas.BookCreate])
-async def read_books(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+async def read_books(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_BOOKS_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
     """
     Retrieve a list of books with optional pagination.
 
     Args:
         skip (int, optional): The number of records to skip. Defaults to 0.
-        limit (int, optional): The maximum number of records to return. Defaults to 100.
+        limit (int, optional): The maximum number of records to return, at most
+            MAX_BOOKS_PAGE_SIZE. Defaults to 100.
         db (AsyncSession): The database session dependency.
 
     Returns:
@@ -154,12 +236,7 @@ async def read_book(book_id: int, db: AsyncSession = Depends(get_db)):
         db (AsyncSession): Database session dependency.
 
     Returns:
-        dict: A dictionary containing the book details, including:
-            - title (str): The title of the book.
-            - author (str): The author of the book.
-            - genre (str): The genre of the book.
-            - year_published (int): The year the book was published.
-            - summary (str): A brief summary of the book.
+        schemas.BookCreate: The book's title, author, genre, year of publication and summary.
 
     Raises:
         HTTPException: If the book with the given ID is not found, raises a 404 error with the message "Book not found".
@@ -167,13 +244,7 @@ async def read_book(book_id: int, db: AsyncSession = Depends(get_db)):
     db_book = await crud.get_book(db, book_id=book_id)
     if db_book is None:
         raise HTTPException(status_code=404, detail="Book not found")
-    return {
-        "title": db_book.title,
-        "author": db_book.author,
-        "genre": db_book.genre,
-        "year_published": db_book.year_published,
-        "summary": db_book.summary,
-    }
+    return db_book
 
 
 @app.put("/books/{book_id}", response_model=schemas.BookCreate)
@@ -192,9 +263,6 @@ async def update_book(book_id: int, book: schemas.BookCreate, db: AsyncSession =
     Raises:
         HTTPException: If the book with the given ID is not found (404).
     """
-    db_book = await crud.get_book(db, book_id=book_id)
-    if db_book is None:
-        raise HTTPException(status_code=404, detail="Book not found")
     updated_book = await crud.update_book_data(db=db, book=book, book_id=book_id)
     return updated_book
 
@@ -214,9 +282,6 @@ async def delete_book(book_id: int, db: AsyncSession = Depends(get_db)):
     Returns:
         Response: An HTTP 204 No Content response indicating successful deletion.
     """
-    db_book = await crud.get_book(db, book_id=book_id)
-    if db_book is None:
-        raise HTTPException(status_code=404, detail="Book not found")
     response = await crud.delete_book_data(db=db, book_id=book_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -240,9 +305,7 @@ async def create_review_for_book(book_id: int, review: schemas.ReviewCreate, db:
     Raises:
         HTTPException: If the book with the given `book_id` is not found.
     """
-    db_book = await crud.get_book(db, book_id=book_id)
-    if db_book is None:
-        raise HTTPException(status_code=404, detail="Book not found")
+    review = review.copy(update={"book_id": book_id})
     db_review = await crud.insert_review_data(db=db, review=review)
     return db_review
 
@@ -253,7 +316,7 @@ async def read_reviews_for_book(book_id: int, db: AsyncSession = Depends(get_db)
     Retrieve reviews for a specific book.
 
     This endpoint fetches all reviews associated with a given book ID. If the book
-    does not exist, a 404 HTTP exception is raised.
+    does not exist, or has no reviews, a 404 HTTP exception is raised.
 
     Args:
         book_id (int): The ID of the book for which reviews are to be retrieved.
@@ -263,11 +326,8 @@ async def read_reviews_for_book(book_id: int, db: AsyncSession = Depends(get_db)
         list[schemas.ReviewCreate]: A list of reviews for the specified book.
 
     Raises:
-        HTTPException: If the book with the given ID is not found.
+        HTTPException: If the book with the given ID is not found, or it has no reviews.
     """
-    db_book = await crud.get_book(db, book_id=book_id)
-    if db_book is None:
-        raise HTTPException(status_code=404, detail="Book not found")
     reviews = await crud.get_review(db, book_id=book_id)
     return reviews
 
@@ -282,12 +342,7 @@ async def read_reviews_for_book(book_id: int, db: AsyncSession = Depends(get_db)
         db (AsyncSession): Database session dependency.
 
     Returns:
-        dict: A dictionary containing the book's details, including:
-            - title (str): The title of the book.
-            - author (str): The author of the book.
-            - genre (str): The genre of the book.
-            - year_published (int): The year the book was published.
-            - summary (str): A summary of the book.
+        schemas.BookCreate: The book's title, author, genre, year of publication and summary.
 
     Raises:
         HTTPException: If the book with the given ID is not found, raises a 404 error.
@@ -295,13 +350,7 @@ async def read_reviews_for_book(book_id: int, db: AsyncSession = Depends(get_db)
     db_book = await crud.get_book(db, book_id=book_id)
     if db_book is None:
         raise HTTPException(status_code=404, detail="Book not found")
-    return {
-        "title": db_book.title,
-        "author": db_book.author,
-        "genre": db_book.genre,
-        "year_published": db_book.year_published,
-        "summary": db_book.summary,
-    }
+    return db_book
 
 
 @app.get("/recommendations", response_model=dict)
@@ -321,8 +370,7 @@ async def recommend_books(prompt: str = Query(...)):
     """
     prompt_ = f"Recommend 5 books based on: {prompt}"
     try:
-        loop = asyncio.get_running_loop()
-        recommendations = await loop.run_in_executor(executor, generate, prompt_)
+        recommendations = await cached_generate(prompt_)
         return {"recommend_book": recommendations}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -344,11 +392,10 @@ async def summarize_with_llamacpp(content: str) -> str:
     """
     try:
         prompt_ = f"Summarize the following content:\n{content}"
-        loop = asyncio.get_running_loop()
-        generate_summary = await loop.run_in_executor(executor, generate, prompt_)
+        generate_summary = await cached_generate(prompt_)
         return generate_summary.strip()
-    except Exception as e:
-        print("Summarization failed:", e)
+    except Exception:
+        logger.exception("Summarization failed")
         return "Summary generation failed."
     
 
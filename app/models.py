@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Float, Index
+from sqlalchemy.orm import relationship
 
 from .database import Base
     
@@ -29,6 +30,7 @@ class Book(Base):
         genre (str): The genre of the book.
         year_published (int): The year the book was published.
         summary (str, optional): A brief summary or description of the book.
+        reviews (list[Review]): The reviews written for the book.
     """
     __tablename__ = "books"
     id = Column(Integer, primary_key=True, index=True)
@@ -37,6 +39,7 @@ class Book(Base):
     genre = Column(String)
     year_published = Column(Integer)
     summary = Column(String, nullable=True)
+    reviews = relationship("Review", back_populates="book", passive_deletes=True)
 
 class Review(Base):
     """
@@ -48,11 +51,15 @@ class Review(Base):
         user_id (int): The ID of the user who wrote the review.
         review_text (str): The text content of the review.
         rating (float): The rating given to the book by the user.
+        book (Book): The book being reviewed.
     """
     __tablename__ = "reviews"
+    # Serves lookups of a book's reviews without scanning the table
+    __table_args__ = (Index("ix_reviews_book_id_id", "book_id", "id"),)
     id = Column(Integer, primary_key=True, index=True)
     book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"))
     user_id = Column(Integer)
     review_text = Column(String)
     rating = Column(Float)
+    book = relationship("Book", back_populates="reviews")
 
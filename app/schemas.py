@@ -42,6 +42,10 @@ class BookCreate(BaseModel):
         genre (str): The genre of the book.
         year_published (int): The year the book was published.
         summary (str, optional): A brief summary of the book. Defaults to None.
+
+    Config:
+        from_attributes (bool): Enables compatibility with ORM objects, allowing
+        the schema to be built directly from a Book model.
     """
     title: str
     author: str
@@ -49,6 +53,9 @@ class BookCreate(BaseModel):
     year_published: int
     summary: str = None
 
+    class Config:
+        from_attributes = True
+
 class ReviewCreate(BaseModel):
     """
     ReviewCreate schema for creating a new review.
@@ -1,27 +1,45 @@
+import uuid
+
 import pytest
-from httpx import AsyncClient
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import AsyncSession
 from .main import app
-from . import schemas
-from .database import get_db
+from . import auth, crud, schemas
+from .database import async_session
+
+# All tests and fixtures share one event loop, so pooled database connections
+# are never reused across loops
+pytestmark = pytest.mark.asyncio(loop_scope="session")
 
-@pytest.fixture
+@pytest_asyncio.fixture(loop_scope="session")
 async def test_db():
     """
     Fixture to provide a test database session.
     """
-    async with get_db() as db:
+    async with async_session() as db:
         yield db
 
-@pytest.fixture
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def client():
     """
-    Fixture to provide an HTTP client for testing.
+    Fixture to provide an HTTP client for testing, shared by the whole session.
+
+    Requests are dispatched to the app in-process through ASGITransport.
     """
-    async with AsyncClient(app=app, base_url="http://test") as ac:
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
 
-@pytest.mark.asyncio
+@pytest_asyncio.fixture(loop_scope="session")
+async def auth_client(client):
+    """
+    Fixture to provide the HTTP client with authentication bypassed.
+    """
+    app.dependency_overrides[auth.get_current_user] = lambda: None
+    yield client
+    app.dependency_overrides.pop(auth.get_current_user, None)
+
 async def test_create_book(client, test_db: AsyncSession):
     """
     Test the creation of a book.
@@ -38,7 +56,6 @@ async def test_create_book(client, test_db: AsyncSession):
     assert data["title"] == book_data["title"]
     assert data["author"] == book_data["author"]
 
-@pytest.mark.asyncio
 async def test_read_books(client, test_db: AsyncSession):
     """
     Test retrieving a list of books.
@@ -47,7 +64,35 @@ async def test_read_books(client, test_db: AsyncSession):
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
-@pytest.mark.asyncio
+async def test_read_books_pagination(auth_client):
+    """
+    Test that the list of books honours the skip and limit parameters.
+    """
+    async with async_session() as db:
+        async with db.begin():
+            for title in ("Page Book 1", "Page Book 2"):
+                book = schemas.BookCreate(
+                    title=title, author="Test Author", genre="Fiction", year_published=2023, summary="Summary"
+                )
+                await crud.insert_book_data(db=db, book=book)
+
+    response = await auth_client.get("/books/", params={"skip": 0, "limit": 2})
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page) == 2
+
+    response = await auth_client.get("/books/", params={"skip": 1, "limit": 1})
+    assert response.status_code == 200
+    assert response.json() == first_page[1:]
+
+async def test_read_books_invalid_pagination(auth_client):
+    """
+    Test that negative or oversized pagination parameters are rejected.
+    """
+    for params in ({"skip": -1}, {"limit": -1}, {"limit": 0}, {"limit": 100000000}):
+        response = await auth_client.get("/books/", params=params)
+        assert response.status_code == 422
+
 async def test_read_book(client, test_db: AsyncSession):
     """
     Test retrieving a single book by ID.
@@ -61,7 +106,6 @@ async def test_read_book(client, test_db: AsyncSession):
     assert "title" in data
     assert "author" in data
 
-@pytest.mark.asyncio
 async def test_update_book(client, test_db: AsyncSession):
     """
     Test updating a book.
@@ -81,7 +125,6 @@ async def test_update_book(client, test_db: AsyncSession):
     assert data["title"] == book_data["title"]
     assert data["author"] == book_data["author"]
 
-@pytest.mark.asyncio
 async def test_delete_book(client, test_db: AsyncSession):
     """
     Test deleting a book.
@@ -92,7 +135,77 @@ async def test_delete_book(client, test_db: AsyncSession):
         pytest.skip("Book with ID 1 not found in test database.")
     assert response.status_code == 204
 
-@pytest.mark.asyncio
+async def test_read_book_reflects_update_and_delete(auth_client):
+    """
+    Test that a cached book is refreshed after an update and gone after a delete.
+    """
+    async with async_session() as db:
+        async with db.begin():
+            book = schemas.BookCreate(
+                title="Cached Book", author="Test Author", genre="Fiction", year_published=2023, summary="Summary"
+            )
+            db_book = await crud.insert_book_data(db=db, book=book)
+    book_id = db_book.id
+
+    response = await auth_client.get(f"/books/{book_id}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Cached Book"
+
+    book_data = {
+        "title": "Cached Book Updated",
+        "author": "Test Author",
+        "genre": "Fiction",
+        "year_published": 2023
+    }
+    response = await auth_client.put(f"/books/{book_id}", json=book_data)
+    assert response.status_code == 200
+
+    response = await auth_client.get(f"/books/{book_id}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Cached Book Updated"
+    assert response.json()["summary"] == "Summary"
+
+    response = await auth_client.delete(f"/books/{book_id}")
+    assert response.status_code == 204
+
+    response = await auth_client.get(f"/books/{book_id}")
+    assert response.status_code == 404
+
+async def test_delete_missing_book(auth_client):
+    """
+    Test deleting a book that does not exist.
+    """
+    response = await auth_client.delete("/books/999999")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Book not found"
+
+async def test_create_review_for_missing_book(auth_client):
+    """
+    Test adding a review to a book that does not exist.
+    """
+    review_data = {
+        "book_id": 999999,
+        "user_id": 1,
+        "review_text": "Great read",
+        "rating": 4.5
+    }
+    response = await auth_client.post("/books/999999/reviews", json=review_data)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Book not found"
+
+async def test_register_duplicate_username(auth_client):
+    """
+    Test that registering an existing username is rejected.
+    """
+    user_data = {"username": f"user-{uuid.uuid4().hex}", "password": "secret"}
+    response = await auth_client.post("/auth/register", json=user_data)
+    assert response.status_code == 200
+    assert response.json()["username"] == user_data["username"]
+
+    response = await auth_client.post("/auth/register", json=user_data)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already registered"
+
 async def test_generate_summary(client):
     """
     Test generating a summary for book content.
@@ -104,7 +217,6 @@ async def test_generate_summary(client):
     assert "summary" in data
     assert isinstance(data["summary"], str)
 
-@pytest.mark.asyncio
 async def test_recommend_books(client):
     """
     Test recommending books based on a prompt.
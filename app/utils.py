@@ -1,6 +1,27 @@
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hash cost, tune so that one hash takes ~250 ms on the deployment hardware
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "2"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Argon2id with OWASP parameters (64 MiB, 3 passes, 2 lanes). bcrypt stays
+# listed so existing hashes still verify and are flagged for rehashing.
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+    bcrypt__rounds=BCRYPT_ROUNDS,
+)
 
 def verify_password(plain, hashed):
     """
@@ -25,4 +46,41 @@ def hash_password(password):
     Returns:
         str: The hashed password.
     """
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+def password_needs_update(hashed):
+    """
+    Check whether a stored hash uses a deprecated scheme or outdated cost settings.
+
+    Args:
+        hashed (str): The hashed password to inspect.
+
+    Returns:
+        bool: True if the password should be rehashed, False otherwise.
+    """
+    return pwd_context.needs_update(hashed)
+
+def configure_logging(level=None):
+    """
+    Configure the root logger to hand records to a background thread.
+
+    The blocking write to stderr happens on the listener's thread, off the event
+    loop. The calling thread still formats the message (including any traceback
+    from logger.exception) when the record is enqueued.
+
+    Args:
+        level (str, optional): The log level. Defaults to the LOG_LEVEL environment variable, or INFO.
+
+    Returns:
+        QueueListener: The started listener. Stop it on shutdown to flush pending records.
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(level or os.getenv("LOG_LEVEL", "INFO").upper())
+    listener.start()
+    return listener
\ No newline at end of file